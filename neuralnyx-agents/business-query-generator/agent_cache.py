@@ -0,0 +1,275 @@
+from fleet import get_client
+import hashlib
+import logging
+import asyncio
+import json
+import time
+import os
+import re
+
+logger = logging.getLogger("openai_agents")
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("NLX_CACHE_ENABLED", "1") != "0"
+CACHE_TTL_SECONDS = int(os.getenv("NLX_CACHE_TTL", "86400"))
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("NLX_LOCAL_CACHE_MAX_ENTRIES", "1024"))
+SEMANTIC_THRESHOLD = float(os.getenv("NLX_SEMANTIC_THRESHOLD", "0.92"))
+SEMANTIC_MAX_ENTRIES = int(os.getenv("NLX_SEMANTIC_MAX_ENTRIES", "4096"))
+EMBEDDING_MODEL = os.getenv("NLX_EMBEDDING_MODEL", "text-embedding-3-small")
+ADAPT_MODEL = os.getenv("NLX_ADAPT_MODEL", "gpt-4o-mini")
+# Caps tool-calling loops so a runaway agent cannot pin a worker
+MAX_TURNS = int(os.getenv("NLX_MAX_TURNS", "6"))
+
+ADAPT_INSTRUCTIONS = """You adapt a previously generated response so that it fits a new, closely related request.
+
+You will receive:
+- CACHED RESPONSE: A JSON response that was generated for a similar request
+- NEW REQUEST: The request that must be answered now
+
+INSTRUCTIONS:
+- Keep everything from the cached response that is still valid for the new request
+- Change only what the new request's inputs require to be different
+- Respect every rule stated in the new request
+- Return a response with exactly the same structure as the cached response"""
+
+
+def _normalize(value):
+    # Canonical form so that cosmetic differences in the inputs share one cache entry
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def normalize_terms(terms):
+    """Sorted, deduplicated, lowercased keywords or topics.
+
+    Accepts a comma/semicolon/newline separated string, a list, or None; empty and
+    non-string items are dropped.
+    """
+    if isinstance(terms, str):
+        terms = re.split(r"[,\n;]", terms)
+    elif not isinstance(terms, (list, tuple)):
+        return []
+    return sorted({t.strip().lower() for t in terms if isinstance(t, str) and t.strip()})
+
+
+def canonical_key_text(key_fields):
+    return json.dumps(_normalize(key_fields), sort_keys=True, separators=(",", ":"))
+
+
+def content_hash(text):
+    return hashlib.sha256((text or "").encode()).hexdigest()
+
+
+class _ExactTier:
+    """Exact-match tier: Redis when REDIS_URL is set, otherwise a bounded in-process dict."""
+
+    def __init__(self):
+        self._redis = None
+        self._local = {}
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(redis_url)
+
+    async def get(self, key):
+        if self._redis is not None:
+            value = await self._redis.get(key)
+            return value.decode() if value is not None else None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        return value
+
+    async def set(self, key, value):
+        if self._redis is not None:
+            await self._redis.setex(key, CACHE_TTL_SECONDS, value)
+            return
+
+        self._local.pop(key, None)
+        if len(self._local) >= LOCAL_CACHE_MAX_ENTRIES:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            del self._local[next(iter(self._local))]
+        self._local[key] = (time.monotonic() + CACHE_TTL_SECONDS, value)
+
+
+class _SemanticTier:
+    """Semantic tier: FAISS inner-product index over normalized embeddings of the key text."""
+
+    def __init__(self):
+        self._index = None
+        self._entries = []
+
+    def nearest(self, vector):
+        if self._index is None or not self._entries:
+            return None
+        scores, ids = self._index.search(vector, 1)
+        score, idx = float(scores[0][0]), int(ids[0][0])
+        if idx < 0 or score < SEMANTIC_THRESHOLD:
+            return None
+        return score, self._entries[idx]
+
+    def add(self, vector, key_text, value):
+        import faiss
+
+        if self._index is None or len(self._entries) >= SEMANTIC_MAX_ENTRIES:
+            self._index = faiss.IndexFlatIP(vector.shape[1])
+            self._entries = []
+        self._index.add(vector)
+        self._entries.append((key_text, value))
+
+
+_exact_tier = None
+_semantic_tiers = {}
+_adapter_agents = {}
+_agent_versions = {}
+
+
+def _get_exact_tier():
+    global _exact_tier
+    if _exact_tier is None:
+        _exact_tier = _ExactTier()
+    return _exact_tier
+
+
+async def _embed(text):
+    import faiss
+    import numpy as np
+
+    response = await get_client().embeddings.create(model=EMBEDDING_MODEL, input=text)
+    vector = np.asarray([response.data[0].embedding], dtype="float32")
+    faiss.normalize_L2(vector)
+    return vector
+
+
+async def _embed_or_none(text):
+    try:
+        return await _embed(text)
+    except Exception as e:
+        logger.warning(f"Failed to embed cache key: {e}")
+        return None
+
+
+def _agent_version(agent, output_type):
+    # Part of the cache key, so a deploy that changes the prompt, the model or the
+    # output schema never serves responses generated before the change
+    version = _agent_versions.get(agent.name)
+    if version is None:
+        schema = output_type.model_json_schema() if hasattr(output_type, "model_json_schema") else None
+        fingerprint = [getattr(agent, "instructions", None), str(getattr(agent, "model", None)), schema]
+        version = content_hash(json.dumps(fingerprint, sort_keys=True, default=str))[:16]
+        _agent_versions[agent.name] = version
+    return version
+
+
+def _get_adapter_agent(agent):
+    adapter = _adapter_agents.get(agent.name)
+    if adapter is None:
+        from agents import Agent
+
+        adapter = Agent(
+            name=f"{agent.name}Adapter",
+            model=ADAPT_MODEL,
+            instructions=ADAPT_INSTRUCTIONS,
+            output_type=agent.output_type,
+        )
+        _adapter_agents[agent.name] = adapter
+    return adapter
+
+
+async def _store(key, key_text, vector, namespace, output):
+    value = output.model_dump_json()
+    try:
+        await _get_exact_tier().set(key, value)
+    except Exception as e:
+        logger.warning(f"Failed to write exact cache entry: {e}")
+    if vector is not None:
+        if namespace not in _semantic_tiers and len(_semantic_tiers) >= LOCAL_CACHE_MAX_ENTRIES:
+            # Dicts keep insertion order, so the first namespace is the oldest one
+            del _semantic_tiers[next(iter(_semantic_tiers))]
+        _semantic_tiers.setdefault(namespace, _SemanticTier()).add(vector, key_text, value)
+
+
+async def cached_run(agent, query, key_fields, semantic=True, semantic_scope=None, cache_if=None):
+    """Run ``agent`` on ``query`` behind an exact + semantic response cache.
+
+    ``key_fields`` are the inputs that determine the response; they are normalized
+    and hashed into the cache key. A semantic match is only looked up among earlier
+    requests with the same ``semantic_scope`` (e.g. the domain), so a response is
+    never adapted from another scope. An output for which ``cache_if`` returns False
+    is returned but not cached. Returns the agent's final output model.
+    """
+    from agents import Runner
+
+    if not CACHE_ENABLED:
+        result = await Runner.run(agent, query, max_turns=MAX_TURNS)
+        return result.final_output
+
+    # output_type may be a prebuilt AgentOutputSchema wrapping the Pydantic model
+    output_type = getattr(agent.output_type, "output_type", agent.output_type)
+    key_text = canonical_key_text(key_fields)
+    key = f"nlx:{agent.name}:{_agent_version(agent, output_type)}:".encode() + hashlib.sha256(key_text.encode()).digest()
+
+    try:
+        cached = await _get_exact_tier().get(key)
+    except Exception as e:
+        logger.warning(f"Failed to read exact cache entry: {e}")
+        cached = None
+    if cached is not None:
+        logger.debug("Exact cache hit for %s", agent.name)
+        return output_type.model_validate_json(cached)
+
+    namespace = agent.name
+    if semantic_scope is not None:
+        namespace = f"{agent.name}:{canonical_key_text(semantic_scope)}"
+    tier = _semantic_tiers.get(namespace) if semantic else None
+
+    vector = None
+    # Only pay for an embedding up front when there is a neighbor it could match
+    if tier is not None:
+        vector = await _embed_or_none(key_text)
+        try:
+            match = tier.nearest(vector) if vector is not None else None
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            match = None
+
+        if match is not None:
+            score, (neighbor_key_text, neighbor_value) = match
+            logger.debug("Semantic cache hit for %s (score=%.3f), adapting cached response", agent.name, score)
+            try:
+                adapted = await Runner.run(
+                    _get_adapter_agent(agent),
+                    f"CACHED RESPONSE:\n{neighbor_value}\n\nNEW REQUEST:\n{query}",
+                    max_turns=MAX_TURNS,
+                )
+                if cache_if is None or cache_if(adapted.final_output):
+                    await _store(key, key_text, vector, namespace, adapted.final_output)
+                return adapted.final_output
+            except Exception as e:
+                logger.warning(f"Adapting cached response failed, running full agent: {e}")
+
+    # Otherwise the embedding for the semantic index is computed while the agent runs
+    embedding = None
+    if semantic and vector is None:
+        embedding = asyncio.create_task(_embed_or_none(key_text))
+    try:
+        result = await Runner.run(agent, query, max_turns=MAX_TURNS)
+    except BaseException:
+        if embedding is not None:
+            embedding.cancel()
+        raise
+    if embedding is not None:
+        vector = await embedding
+    if cache_if is None or cache_if(result.final_output):
+        await _store(key, key_text, vector, namespace, result.final_output)
+    return result.final_output
@@ -1,23 +1,21 @@
-from agents import Agent, Runner, WebSearchTool
+from fleet import install as install_fleet
+from _entrypoint import make_entrypoint
+from agent_cache import cached_run, normalize_terms
+from _logging import configure
 from pydantic import BaseModel
 from typing import List
+from collections import defaultdict
 import logging
 import asyncio
-import sys
 import json
+import os
 
 # Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+configure()
 logger = logging.getLogger("openai_agents")
 
-# Configure OpenAI library logging
-logging.getLogger("openai").setLevel(logging.DEBUG)
+# Per-request timeout in seconds
+AGENT_TIMEOUT = float(os.getenv("NLX_AGENT_TIMEOUT", "90"))
 
 # Define the input and output schemas using Pydantic
 class BusinessQueryInput(BaseModel):
@@ -29,10 +27,9 @@ class BusinessQueryInput(BaseModel):
 class UserQueriesOutput(BaseModel):
     queries: List[str]
 
-logger.debug("Initializing business query generation agent")
-agent = Agent(
-    name="BusinessQueryGenerator",
-    instructions="""You are an expert in generating user queries that help businesses appear in ChatGPT and other LLM results.
+# Static system prompt: never interpolate request data here, it must stay
+# byte-identical so the provider's prompt cache can reuse it
+_SYSTEM_PROMPT = """You are an expert in generating user queries that help businesses appear in ChatGPT and other LLM results.
 
 You will receive:
 - BUSINESS SUMMARY: What the company does, key products/services, target audience, and differentiators
@@ -54,12 +51,42 @@ Guidelines:
 - Focus on queries that would lead users to discover this specific business
 - Make queries specific enough to be actionable but broad enough to capture various user intents
 
-Generate exactly 10 unique user queries that would help this business appear in LLM search results.""",
-    tools=[
-        WebSearchTool(),
-    ],
-    output_type=UserQueriesOutput,
-)
+Generate exactly 10 unique user queries that would help this business appear in LLM search results."""
+
+_agent = None
+
+def _get_agent():
+    # Built on first use: the agents SDK (and openai underneath) is only imported
+    # once a request needs it, not when the service starts
+    global _agent
+    if _agent is None:
+        from agents import Agent, AgentOutputSchema, ModelSettings, WebSearchTool
+        install_fleet()
+
+        logger.debug("Initializing business query generation agent")
+        _agent = Agent(
+            name="BusinessQueryGenerator",
+            instructions=_SYSTEM_PROMPT,
+            tools=[WebSearchTool()],
+            # Build the output schema once so every run reuses the same compiled validator.
+            # Structured output is validated by pydantic-core straight from the raw JSON, so
+            # no separate JSON Schema validator pass is needed in front of it
+            output_type=AgentOutputSchema(UserQueriesOutput),
+            # Lets the provider reuse the cached system-prompt prefix across invocations
+            model_settings=ModelSettings(extra_body={"prompt_cache_key": "business-query-v1"}),
+        )
+    return _agent
+
+# Query template, formatted per request with format_map
+_QUERY_TMPL = """BUSINESS SUMMARY: {summary}
+
+GOALS: {goals}
+
+EXISTING KEYWORDS: {existingKeywords}
+
+DOMAIN: {domain}
+
+Please generate 10 new user queries that would help this business appear in LLM search results.""".format_map
 
 async def main(business_data=None):
     if business_data is None:
@@ -70,62 +97,49 @@ async def main(business_data=None):
             "domain": "example.com"
         }
     
-    # Format the query for business query generation
-    query = f"""BUSINESS SUMMARY: {business_data.get('summary', '')}
-
-GOALS: {business_data.get('goals', '')}
+    # Canonical keyword list: no duplicate tokens billed, and one cache key for equivalent inputs
+    existing_keywords = ", ".join(normalize_terms(business_data.get('existingKeywords')))
 
-EXISTING KEYWORDS: {business_data.get('existingKeywords', '')}
-
-DOMAIN: {business_data.get('domain', '')}
-
-Please generate 10 new user queries that would help this business appear in LLM search results."""
+    # Format the query for business query generation
+    query = _QUERY_TMPL(defaultdict(str, business_data, existingKeywords=existing_keywords))
     
-    logger.debug(f"Running business query generation for domain: {business_data.get('domain', 'unknown')}")
+    logger.debug("Running business query generation for domain: %s", business_data.get('domain', 'unknown'))
     
     try:
         logger.debug("Starting agent execution")
-        result = await Runner.run(agent, query)
-        logger.debug(f"Agent execution completed with result type: {type(result)}")
+        # Served from the response cache when an equivalent request was already answered.
+        # Near-neighbor reuse stays within one domain: with default goals and no keywords,
+        # requests for different businesses differ only in the domain string
+        domain = business_data.get('domain', '')
+        output = await cached_run(_get_agent(), query, (domain, business_data.get('goals', ''), existing_keywords), semantic_scope=domain)
+        logger.debug("Agent execution completed with output type: %s", type(output))
         
         # The output_type automatically validates and parses the JSON
-        # result.final_output will be a UserQueriesOutput object
-        logger.debug(f"Parsed output: {result.final_output}")
-        return result.final_output
+        # output will be a UserQueriesOutput object
+        logger.debug("Parsed output: %s", output)
+        return output
         
     except Exception as e:
         logger.error(f"Error during agent execution: {e}", exc_info=True)
         raise
 
 # Integration with Bedrock AgentCore
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
-app = BedrockAgentCoreApp()
+_FALLBACK_BUSINESS = {"queries": ["error", "occurred", "during", "execution", "check", "logs", "for", "details", "about", "failure"]}
 
-@app.entrypoint
-async def agent_invocation(payload, context):
-    logger.debug(f"Received payload: {payload}")
-    
+def _extract_business(payload):
     # Extract business data from payload
-    business_data = {
+    return {
         "summary": payload.get("summary", ""),
         "goals": payload.get("goals", ""),
         "existingKeywords": payload.get("existingKeywords", ""),
         "domain": payload.get("domain", "example.com")
     }
-    
-    try:
-        result = await main(business_data)
-        logger.debug("Agent execution completed successfully")
-        # Convert Pydantic model to dict for JSON serialization
-        if hasattr(result, 'model_dump'):
-            return {"result": result.model_dump()}
-        else:
-            return {"result": result}
-            
-    except Exception as e:
-        logger.error(f"Error during agent execution: {e}", exc_info=True)
-        return {"result": {"queries": ["error", "occurred", "during", "execution", "check", "logs", "for", "details", "about", "failure"]}}
 
-# Run the app when imported
+agent_invocation = make_entrypoint(main, _extract_business, _FALLBACK_BUSINESS, timeout=AGENT_TIMEOUT)
+
+# Run the app when executed; the AgentCore runtime is only loaded here
 if __name__== "__main__":
+    from bedrock_agentcore.runtime import BedrockAgentCoreApp
+    app = BedrockAgentCoreApp()
+    app.entrypoint(agent_invocation)
     app.run()
@@ -0,0 +1,31 @@
+import logging
+import asyncio
+
+logger = logging.getLogger("openai_agents")
+
+
+def make_entrypoint(agent_main, payload_to_input, fallback, timeout):
+    """Build the AgentCore entrypoint for ``agent_main``.
+
+    ``payload_to_input`` turns the request payload into the argument of ``agent_main``.
+    Any error or a run longer than ``timeout`` seconds returns ``fallback`` as the result.
+    """
+    async def agent_invocation(payload, context):
+        logger.debug("Received payload: %s", payload)
+
+        try:
+            data = payload_to_input(payload)
+            # Bounds tail latency: a hung web search or tool loop falls through to the fallback result
+            result = await asyncio.wait_for(agent_main(data), timeout=timeout)
+            logger.debug("Agent execution completed successfully")
+            # Convert Pydantic model to dict for JSON serialization
+            if hasattr(result, 'model_dump'):
+                return {"result": result.model_dump()}
+            else:
+                return {"result": result}
+
+        except Exception as e:
+            logger.error(f"Error during agent execution: {e}", exc_info=True)
+            return {"result": fallback}
+
+    return agent_invocation
@@ -0,0 +1,41 @@
+import os
+
+_client = None
+_client_pid = None
+
+
+def get_client():
+    """Process-wide AsyncOpenAI client over a pooled HTTP/2 connection.
+
+    Rebuilt after a fork so a worker never reuses its parent's connections.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        from openai import AsyncOpenAI
+        import httpx
+
+        _client = AsyncOpenAI(
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        )
+        _client_pid = os.getpid()
+    return _client
+
+
+_installed = False
+
+
+def install():
+    """Send the model requests of every Agent without its own client through the shared client.
+
+    Called when the agents are first built, so importing this module stays cheap.
+    """
+    global _installed
+    if not _installed:
+        from agents import set_default_openai_client
+
+        set_default_openai_client(get_client())
+        _installed = True
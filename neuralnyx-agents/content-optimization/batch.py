@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+import logging
+import asyncio
+
+logger = logging.getLogger("openai_agents")
+
+
+@dataclass
+class ProcessorConfig:
+    max_workers: int = 10
+    timeout_per_item: float = 120.0
+    max_retries: int = 3
+    retry_backoff: float = 2.0
+
+
+async def _process_item(index, item, optimize, config, sem, deadline):
+    loop = asyncio.get_running_loop()
+    async with sem:
+        for attempt in range(1, config.max_retries + 1):
+            # Every attempt fits in what is left of the overall budget
+            timeout = config.timeout_per_item
+            if deadline is not None:
+                timeout = min(timeout, deadline - loop.time())
+                if timeout <= 0:
+                    raise asyncio.TimeoutError(f"No time left to optimize item {index}")
+            try:
+                return await asyncio.wait_for(optimize(item), timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Optimizing item {index} failed (attempt {attempt}/{config.max_retries}): {e!r}")
+                backoff = config.retry_backoff ** (attempt - 1)
+                if attempt == config.max_retries or (deadline is not None and loop.time() + backoff >= deadline):
+                    raise
+                await asyncio.sleep(backoff)
+
+
+async def optimize_many(items, optimize, config=None, timeout=None):
+    """Run ``optimize`` over every item with at most ``config.max_workers`` in flight.
+
+    Returns one entry per item, in input order; an item that still fails after
+    its retries is returned as the raised exception. With ``timeout`` (seconds),
+    per-item timeouts and retries are cut to the remaining budget, and items that
+    have not finished when it runs out are returned as ``asyncio.TimeoutError``.
+    """
+    config = config or ProcessorConfig()
+    if not items:
+        return []
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    sem = asyncio.Semaphore(config.max_workers)
+    tasks = [
+        asyncio.create_task(_process_item(i, item, optimize, config, sem, deadline))
+        for i, item in enumerate(items)
+    ]
+
+    # Items already finished keep their results even if others run out of time
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    return [
+        asyncio.TimeoutError(f"Item {i} did not finish in time") if task.cancelled()
+        else task.exception() or task.result()
+        for i, task in enumerate(tasks)
+    ]
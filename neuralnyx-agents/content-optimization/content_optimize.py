@@ -1,23 +1,22 @@
-from agents import Agent, Runner, WebSearchTool
+from fleet import install as install_fleet
+from _entrypoint import make_entrypoint
+from agent_cache import MAX_TURNS, cached_run, content_hash, normalize_terms
+from _logging import configure
+from batch import optimize_many
 from pydantic import BaseModel
 from typing import List
+from collections import defaultdict
 import logging
 import asyncio
-import sys
 import json
+import os
 
 # Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+configure()
 logger = logging.getLogger("openai_agents")
 
-# Configure OpenAI library logging
-logging.getLogger("openai").setLevel(logging.DEBUG)
+# Per-request timeout in seconds, content optimization is the slowest agent
+OPTIMIZE_TIMEOUT = float(os.getenv("NLX_OPTIMIZE_TIMEOUT", "180"))
 
 # Define the input and output schemas using Pydantic
 class ContentOptimizationInput(BaseModel):
@@ -29,10 +28,9 @@ class ContentOptimizationInput(BaseModel):
 class OptimizedContentOutput(BaseModel):
     content: str
 
-logger.debug("Initializing content optimization agent")
-agent = Agent(
-    name="ContentOptimizationAgent",
-    instructions="""You are an expert content writer and SEO specialist who specializes in optimizing blog posts for better readability, engagement, and search engine performance.
+# Static system prompt: never interpolate request data here, it must stay
+# byte-identical so the provider's prompt cache can reuse it
+_SYSTEM_PROMPT = """You are an expert content writer and SEO specialist who specializes in optimizing blog posts for better readability, engagement, and search engine performance.
 
 Your task is to optimize the provided blog post content by:
 1. Improving readability and flow while maintaining the original message
@@ -64,79 +62,195 @@ Return ONLY the optimized content as a single string in MARKDOWN format. Do not
 - Maintains the original message while improving presentation
 - Uses proper markdown syntax throughout (headings, lists, emphasis, links, etc.)
 
-Focus on creating content that is engaging, informative, and optimized for both human readers and search engines, formatted in clean markdown.""",
-    tools=[ WebSearchTool()],
-    output_type=OptimizedContentOutput,
-)
+Focus on creating content that is engaging, informative, and optimized for both human readers and search engines, formatted in clean markdown."""
 
-async def main(content_data=None):
-    if content_data is None:
-        content_data = {
-            "content": "Sample blog content to optimize",
-            "title": "Sample Title",
-            "meta": "Sample meta description",
-            "topics": ["sample", "topic"]
-        }
-    
-    # Format the query for content optimization
-    query = f"""Please optimize the following blog post content:
+_agent = None
+_stream_agent = None
+
+def _get_agents():
+    # Built on first use: the agents SDK (and openai underneath) is only imported
+    # once a request needs it, not when the service starts
+    global _agent, _stream_agent
+    if _agent is None:
+        from agents import Agent, AgentOutputSchema, ModelSettings, WebSearchTool
+        install_fleet()
+
+        logger.debug("Initializing content optimization agent")
+        _agent = Agent(
+            name="ContentOptimizationAgent",
+            instructions=_SYSTEM_PROMPT,
+            tools=[WebSearchTool()],
+            # Build the output schema once so every run reuses the same compiled validator.
+            # Structured output is validated by pydantic-core straight from the raw JSON, so
+            # no separate JSON Schema validator pass is needed in front of it
+            output_type=AgentOutputSchema(OptimizedContentOutput),
+            # Lets the provider reuse the cached system-prompt prefix across invocations
+            model_settings=ModelSettings(extra_body={"prompt_cache_key": "content-optimization-v1"}),
+        )
+
+        # Same agent with a plain-text output so the markdown itself can be streamed,
+        # a structured output would stream JSON fragments instead
+        _stream_agent = _agent.clone(name="ContentOptimizationStreamAgent", output_type=None)
+    return _agent, _stream_agent
+
+_DEFAULT_CONTENT_DATA = {
+    "content": "Sample blog content to optimize",
+    "title": "Sample Title",
+    "meta": "Sample meta description",
+    "topics": ["sample", "topic"]
+}
+
+def _normalize_topics(content_data):
+    # Canonical topic list so equivalent requests share one prompt and cache key
+    topics = normalize_terms(content_data.get('topics'))
+    return {**content_data, "topics": topics}
+
+# Query template, formatted per request with format_map
+_QUERY_TMPL = """Please optimize the following blog post content:
 
-TITLE: {content_data.get('title', '')}
-META DESCRIPTION: {content_data.get('meta', '')}
-TOPICS: {', '.join(content_data.get('topics', []))}
+TITLE: {title}
+META DESCRIPTION: {meta}
+TOPICS: {topics}
 
 CONTENT TO OPTIMIZE:
-{content_data.get('content', '')}
+{content}
 
 Please optimize this content for better readability, engagement, and SEO while maintaining the original message and tone. Focus on improving structure, flow, and incorporating the provided topics naturally throughout the content.
 
 IMPORTANT: Return the optimized content in MARKDOWN format with proper headings (# ## ###), emphasis (**bold**, *italic*), lists, and other markdown elements for better structure and readability.
 
-If you need additional information about any of the topics or want to ensure you're using the most current and accurate information, feel free to use web search to research the topics and enhance the content accordingly."""
+If you need additional information about any of the topics or want to ensure you're using the most current and accurate information, feel free to use web search to research the topics and enhance the content accordingly.""".format_map
+
+def _build_query(content_data):
+    # Format the query for content optimization
+    return _QUERY_TMPL(defaultdict(str, content_data, topics=", ".join(content_data.get('topics', []))))
+
+async def main(content_data=None):
+    if content_data is None:
+        content_data = _DEFAULT_CONTENT_DATA
+    content_data = _normalize_topics(content_data)
     
-    logger.debug(f"Running content optimization for title: {content_data.get('title', 'Untitled')}")
+    query = _build_query(content_data)
+    
+    logger.debug("Running content optimization for title: %s", content_data.get('title', 'Untitled'))
     
     try:
         logger.debug("Starting agent execution")
-        result = await Runner.run(agent, query)
-        logger.debug(f"Agent execution completed with result type: {type(result)}")
+        # Served from the response cache when the same post was already optimized
+        key_fields = (
+            content_data.get('title', ''),
+            content_data.get('meta', ''),
+            content_data.get('topics', []),
+            content_hash(content_data.get('content', '')),
+        )
+        output = await cached_run(_get_agents()[0], query, key_fields, semantic=False)
+        logger.debug("Agent execution completed with output type: %s", type(output))
         
         # The output_type automatically validates and parses the JSON
-        # result.final_output will be an OptimizedContentOutput object
-        logger.debug(f"Parsed output: {result.final_output}")
+        # output will be an OptimizedContentOutput object
+        logger.debug("Parsed output: %s", output)
         # Return just the content string, not the full object
-        return result.final_output.content
+        return output.content
         
     except Exception as e:
         logger.error(f"Error during agent execution: {e}", exc_info=True)
         raise
 
+async def stream(content_data=None):
+    """Yield the optimized markdown as it is generated instead of buffering it."""
+    if content_data is None:
+        content_data = _DEFAULT_CONTENT_DATA
+    content_data = _normalize_topics(content_data)
+
+    logger.debug("Streaming content optimization for title: %s", content_data.get('title', 'Untitled'))
+
+    from agents import Runner
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    result = Runner.run_streamed(_get_agents()[1], _build_query(content_data), max_turns=MAX_TURNS)
+    events = result.stream_events()
+    # Same bound as the buffered path; only the wait for the next event is timed,
+    # never the caller's handling of a chunk that was already yielded
+    deadline = asyncio.get_running_loop().time() + OPTIMIZE_TIMEOUT
+    streamed = False
+    try:
+        while True:
+            async with asyncio.timeout_at(deadline):
+                event = await anext(events, None)
+            if event is None:
+                break
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                streamed = True
+                yield event.data.delta
+    except TimeoutError:
+        logger.error(f"Streaming content optimization timed out after {OPTIMIZE_TIMEOUT}s")
+        result.cancel()
+        if streamed:
+            # Surfaces as an error event, so the client knows the markdown is incomplete
+            raise TimeoutError(f"Content optimization timed out after {OPTIMIZE_TIMEOUT}s, the streamed content is incomplete") from None
+        yield _FALLBACK_CONTENT
+    finally:
+        await events.aclose()
+
 # Integration with Bedrock AgentCore
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
-app = BedrockAgentCoreApp()
+_FALLBACK_CONTENT = "Error occurred during content optimization. Please try again."
 
-@app.entrypoint
-async def agent_invocation(payload, context):
-    logger.debug(f"Received payload: {payload}")
-    
-    # Extract content data from payload
-    content_data = {
+def _extract_content_data(payload):
+    return {
         "content": payload.get("content", ""),
         "title": payload.get("title", ""),
         "meta": payload.get("meta", ""),
         "topics": payload.get("topics", [])
     }
-    
+
+# main() returns the optimized markdown string directly, so it is passed through as the result
+_optimize_invocation = make_entrypoint(main, _extract_content_data, _FALLBACK_CONTENT, timeout=OPTIMIZE_TIMEOUT)
+
+def _extract_batch_item(item):
+    # A malformed item gets the fallback result instead of failing the whole batch
     try:
-        result = await main(content_data)
-        logger.debug("Agent execution completed successfully")
-        # Return just the optimized content string directly
-        return {"result": result}
-            
+        return _extract_content_data(item)
     except Exception as e:
-        logger.error(f"Error during agent execution: {e}", exc_info=True)
-        return {"result": "Error occurred during content optimization. Please try again."}
+        logger.error(f"Invalid batch item {item!r}: {e}")
+        return None
+
+async def agent_invocation_batch(payload, context):
+    items = payload.get("items")
+    if not isinstance(items, list):
+        logger.error(f"Batch items must be a list, got: {type(items).__name__}")
+        return {"results": []}
+
+    results = [_FALLBACK_CONTENT] * len(items)
+    valid = [(i, data) for i, data in enumerate(map(_extract_batch_item, items)) if data is not None]
+    logger.debug("Optimizing batch of %d posts", len(valid))
+
+    # Posts still running when the request timeout is reached get the fallback,
+    # posts that already finished are returned as usual
+    optimized = await optimize_many([data for _, data in valid], main, timeout=OPTIMIZE_TIMEOUT)
+
+    for (i, _), result in zip(valid, optimized):
+        if not isinstance(result, BaseException):
+            results[i] = result
+    return {"results": results}
+
+async def agent_invocation(payload, context):
+    if not isinstance(payload, dict):
+        logger.error(f"Payload must be a JSON object, got: {type(payload).__name__}")
+        return {"result": _FALLBACK_CONTENT}
+
+    # AgentCore exposes a single entrypoint, so batch and streaming requests are routed from here
+    if "items" in payload:
+        return await agent_invocation_batch(payload, context)
+
+    # Streaming callers get the markdown chunk by chunk as server-sent events
+    if payload.get("stream"):
+        return stream(_extract_content_data(payload))
+
+    return await _optimize_invocation(payload, context)
 
-# Run the app when imported
+# Run the app when executed; the AgentCore runtime is only loaded here
 if __name__== "__main__":
+    from bedrock_agentcore.runtime import BedrockAgentCoreApp
+    app = BedrockAgentCoreApp()
+    app.entrypoint(agent_invocation)
     app.run()
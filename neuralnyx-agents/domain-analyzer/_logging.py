@@ -0,0 +1,18 @@
+import logging
+import sys
+import os
+
+
+def configure():
+    # Idempotent: only the first module to call this attaches a handler
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=os.getenv("NLX_LOG_LEVEL", "INFO"),
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.StreamHandler(sys.stdout)
+            ]
+        )
+
+    # DEBUG on the OpenAI SDK formats every request/response payload, keep it off by default
+    logging.getLogger("openai").setLevel(os.getenv("OPENAI_LOG_LEVEL", "WARNING"))
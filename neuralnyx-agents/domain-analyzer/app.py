@@ -1,23 +1,20 @@
-from agents import Agent, Runner, WebSearchTool
+from fleet import install as install_fleet
+from _entrypoint import make_entrypoint
+from agent_cache import cached_run
+from _logging import configure
 from pydantic import BaseModel
 from typing import List
 import logging
 import asyncio
-import sys
 import json
+import os
 
 # Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+configure()
 logger = logging.getLogger("openai_agents")
 
-# Configure OpenAI library logging
-logging.getLogger("openai").setLevel(logging.DEBUG)
+# Per-request timeout in seconds
+AGENT_TIMEOUT = float(os.getenv("NLX_AGENT_TIMEOUT", "90"))
 
 # Define the input and output schemas using Pydantic
 class DomainAnalysisInput(BaseModel):
@@ -30,10 +27,9 @@ class BusinessSummaryOutput(BaseModel):
     key_services: List[str]
     industry: str
 
-logger.debug("Initializing domain analysis agent")
-agent = Agent(
-    name="DomainAnalysisAgent",
-    instructions="""You are an expert business analyst who specializes in understanding and analyzing businesses based on their domain names and web presence.
+# Static system prompt: never interpolate request data here, it must stay
+# byte-identical so the provider's prompt cache can reuse it
+_SYSTEM_PROMPT = """You are an expert business analyst who specializes in understanding and analyzing businesses based on their domain names and web presence.
 
 Your task is to analyze a given domain and generate a comprehensive business summary by:
 1. Using web search to research the domain and understand what the business does
@@ -57,19 +53,34 @@ Provide a structured analysis with:
 - key_services: List of main services or products offered
 - industry: The primary industry sector (e.g., "Technology", "Finance", "Healthcare", "Tax Services")
 
-Be thorough in your research and provide accurate, detailed information based on what you find through web search.""",
-    tools=[
-        WebSearchTool(),
-    ],
-    output_type=BusinessSummaryOutput,
-)
+Be thorough in your research and provide accurate, detailed information based on what you find through web search."""
 
-async def main(domain=None):
-    if domain is None:
-        domain = "example.com"
-    
-    # Format the query for domain analysis
-    query = f"""Please analyze the domain: {domain}
+_agent = None
+
+def _get_agent():
+    # Built on first use: the agents SDK (and openai underneath) is only imported
+    # once a request needs it, not when the service starts
+    global _agent
+    if _agent is None:
+        from agents import Agent, AgentOutputSchema, ModelSettings, WebSearchTool
+        install_fleet()
+
+        logger.debug("Initializing domain analysis agent")
+        _agent = Agent(
+            name="DomainAnalysisAgent",
+            instructions=_SYSTEM_PROMPT,
+            tools=[WebSearchTool()],
+            # Build the output schema once so every run reuses the same compiled validator.
+            # Structured output is validated by pydantic-core straight from the raw JSON, so
+            # no separate JSON Schema validator pass is needed in front of it
+            output_type=AgentOutputSchema(BusinessSummaryOutput),
+            # Lets the provider reuse the cached system-prompt prefix across invocations
+            model_settings=ModelSettings(extra_body={"prompt_cache_key": "domain-analyzer-v1"}),
+        )
+    return _agent
+
+# Query template, formatted per request with format_map
+_QUERY_TMPL = """Please analyze the domain: {domain}
 
 Use web search to research this domain thoroughly and provide a comprehensive business analysis including:
 - What the business does and its main services/products
@@ -77,48 +88,44 @@ Use web search to research this domain thoroughly and provide a comprehensive bu
 - Target audience
 - Key services offered
 
-Be thorough in your research and provide accurate information based on what you find."""
+Be thorough in your research and provide accurate information based on what you find.""".format_map
+
+async def main(domain=None):
+    if domain is None:
+        domain = "example.com"
     
-    logger.debug(f"Running domain analysis for: {domain}")
+    # Format the query for domain analysis
+    query = _QUERY_TMPL({"domain": domain})
+    
+    logger.debug("Running domain analysis for: %s", domain)
     
     try:
         logger.debug("Starting agent execution")
-        result = await Runner.run(agent, query)
-        logger.debug(f"Agent execution completed with result type: {type(result)}")
+        # Served from the response cache when an equivalent request was already answered
+        output = await cached_run(_get_agent(), query, (domain,), semantic=False)
+        logger.debug("Agent execution completed with output type: %s", type(output))
         
         # The output_type automatically validates and parses the JSON
-        # result.final_output will be a BusinessSummaryOutput object
-        logger.debug(f"Parsed output: {result.final_output}")
-        return result.final_output
+        # output will be a BusinessSummaryOutput object
+        logger.debug("Parsed output: %s", output)
+        return output
         
     except Exception as e:
         logger.error(f"Error during agent execution: {e}", exc_info=True)
         raise
 
 # Integration with Bedrock AgentCore
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
-app = BedrockAgentCoreApp()
+_FALLBACK_SUMMARY = {"summary": "Error occurred during domain analysis", "business_type": "Unknown", "target_audience": "Unknown", "key_services": ["Error"], "industry": "Unknown"}
 
-@app.entrypoint
-async def agent_invocation(payload, context):
-    logger.debug(f"Received payload: {payload}")
-    
+def _extract_domain(payload):
     # Extract domain from payload
-    domain = payload.get("domain", payload.get("prompt", "example.com"))
-    
-    try:
-        result = await main(domain)
-        logger.debug("Agent execution completed successfully")
-        # Convert Pydantic model to dict for JSON serialization
-        if hasattr(result, 'model_dump'):
-            return {"result": result.model_dump()}
-        else:
-            return {"result": result}
-            
-    except Exception as e:
-        logger.error(f"Error during agent execution: {e}", exc_info=True)
-        return {"result": {"summary": "Error occurred during domain analysis", "business_type": "Unknown", "target_audience": "Unknown", "key_services": ["Error"], "industry": "Unknown"}}
+    return payload.get("domain", payload.get("prompt", "example.com"))
+
+agent_invocation = make_entrypoint(main, _extract_domain, _FALLBACK_SUMMARY, timeout=AGENT_TIMEOUT)
 
-# Run the app when imported
+# Run the app when executed; the AgentCore runtime is only loaded here
 if __name__== "__main__":
+    from bedrock_agentcore.runtime import BedrockAgentCoreApp
+    app = BedrockAgentCoreApp()
+    app.entrypoint(agent_invocation)
     app.run()
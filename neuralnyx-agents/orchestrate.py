@@ -0,0 +1,83 @@
+import importlib.util
+import asyncio
+import json
+import sys
+import os
+
+# Upper bound on agent runs in flight at once, keeps us under provider rate limits
+MAX_CONCURRENCY = 5
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load(name, relative_path):
+    # Each agent lives in its own service directory (two of them are named app.py),
+    # so load them by path under distinct module names. The shared helper modules
+    # (fleet, agent_cache, _logging) are identical in every service directory, so
+    # whichever copy is imported first is shared by all four agents.
+    path = os.path.join(_ROOT, relative_path)
+    service_dir = os.path.dirname(path)
+    if service_dir not in sys.path:
+        sys.path.append(service_dir)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+domain_analyzer = _load("domain_analyzer", "domain-analyzer/app.py")
+business_query_generator = _load("business_query_generator", "business-query-generator/app.py")
+content_generator = _load("content_generator", "content-generator/app_content.py")
+content_optimize = _load("content_optimize", "content-optimization/content_optimize.py")
+
+
+async def run_pipeline(domain, existing_keywords, goals="Appear in ChatGPT/LLM results for relevant searches", platform="reddit"):
+    """Run all four agents for ``domain``, concurrently wherever the data allows.
+
+    The domain summary feeds both query generation and content generation, which
+    run side by side; every generated piece is then optimized concurrently.
+    """
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def bounded(coro):
+        async with sem:
+            return await coro
+
+    summary = await domain_analyzer.main(domain)
+
+    queries, content = await asyncio.gather(
+        bounded(business_query_generator.main({
+            "summary": summary.summary,
+            "goals": goals,
+            "existingKeywords": existing_keywords,
+            "domain": domain
+        })),
+        bounded(content_generator.main({
+            "topics": summary.key_services,
+            "platform": platform
+        })),
+    )
+
+    optimized_content = await asyncio.gather(*(
+        bounded(content_optimize.main({
+            "content": piece,
+            "title": "",
+            "meta": "",
+            "topics": content.topics_covered
+        }))
+        for piece in content.content
+    ))
+
+    return {
+        "summary": summary.model_dump(),
+        "queries": queries.model_dump(),
+        "content": content.model_dump(),
+        "optimized_content": list(optimized_content)
+    }
+
+
+if __name__ == "__main__":
+    domain = sys.argv[1] if len(sys.argv) > 1 else "example.com"
+    existing_keywords = sys.argv[2] if len(sys.argv) > 2 else ""
+    print(json.dumps(asyncio.run(run_pipeline(domain, existing_keywords)), indent=2))
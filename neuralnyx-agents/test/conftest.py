@@ -0,0 +1,8 @@
+import sys
+import os
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The shared helpers are identical in every service directory (test_shared_helpers
+# checks that), so the tests import them from one of the copies
+sys.path.insert(0, os.path.join(_ROOT, "business-query-generator"))
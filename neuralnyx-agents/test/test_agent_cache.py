@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+from typing import List
+import asyncio
+import sys
+
+from pydantic import BaseModel
+import pytest
+
+import agent_cache
+
+
+class Output(BaseModel):
+    queries: List[str]
+
+
+class StubRunner:
+    def __init__(self):
+        self.runs = []
+        self.events = []
+
+    async def run(self, agent, query, max_turns):
+        self.runs.append(agent.name)
+        self.events.append("run")
+        return SimpleNamespace(final_output=Output(queries=[f"{agent.name}: {query}"]))
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+    runner = StubRunner()
+    monkeypatch.setitem(sys.modules, "agents", SimpleNamespace(Runner=runner, Agent=SimpleNamespace))
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(agent_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(agent_cache, "_exact_tier", None)
+    monkeypatch.setattr(agent_cache, "_semantic_tiers", {})
+    monkeypatch.setattr(agent_cache, "_adapter_agents", {})
+    monkeypatch.setattr(agent_cache, "_agent_versions", {})
+
+    async def embed(text):
+        runner.events.append("embed")
+        # Every request looks alike, so only the scope keeps them apart
+        return np.ones((1, 8), dtype="float32") / np.sqrt(8)
+
+    monkeypatch.setattr(agent_cache, "_embed", embed)
+    return runner
+
+
+_AGENT = SimpleNamespace(name="Queries", output_type=Output)
+
+
+def test_exact_hit_skips_the_agent(runner):
+    async def run():
+        first = await agent_cache.cached_run(_AGENT, "q", ("Example.com", "grow"), semantic=False)
+        second = await agent_cache.cached_run(_AGENT, "q", ("example.com ", "GROW"), semantic=False)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert runner.runs == ["Queries"]
+
+
+def test_semantic_match_stays_within_its_scope(runner):
+    async def run():
+        await agent_cache.cached_run(_AGENT, "q1", ("a.com", "grow", ""), semantic_scope="a.com")
+        await agent_cache.cached_run(_AGENT, "q2", ("b.com", "grow", ""), semantic_scope="b.com")
+        await agent_cache.cached_run(_AGENT, "q3", ("a.com", "grow", "seo"), semantic_scope="a.com")
+
+    asyncio.run(run())
+    # b.com is answered by the full agent; only the second a.com request adapts a neighbor
+    assert runner.runs == ["Queries", "Queries", "QueriesAdapter"]
+
+
+def test_first_request_in_a_scope_does_not_wait_for_an_embedding(runner):
+    asyncio.run(agent_cache.cached_run(_AGENT, "q1", ("a.com", "grow", ""), semantic_scope="a.com"))
+    # Nothing to match yet, so the agent starts before the embedding is computed for the index
+    assert runner.events == ["run", "embed"]
+    assert agent_cache._semantic_tiers
+
+
+def test_changed_instructions_do_not_reuse_cached_responses(runner, monkeypatch):
+    async def run(instructions):
+        agent = SimpleNamespace(name="Queries", output_type=Output, instructions=instructions, model="m")
+        # A deploy starts a fresh process, so the version is computed again
+        monkeypatch.setattr(agent_cache, "_agent_versions", {})
+        await agent_cache.cached_run(agent, "q", ("a.com",), semantic=False)
+
+    asyncio.run(run("v1"))
+    asyncio.run(run("v1"))
+    asyncio.run(run("v2"))
+    assert runner.runs == ["Queries", "Queries"]
+
+
+@pytest.mark.parametrize("terms, expected", [
+    ("AI, green ;ai\n", ["ai", "green"]),
+    (["Green", " ai ", "", None, 3], ["ai", "green"]),
+    (None, []),
+])
+def test_normalize_terms(terms, expected):
+    assert agent_cache.normalize_terms(terms) == expected
+
+
+def test_rejected_output_is_not_cached(runner):
+    async def run():
+        for _ in range(2):
+            await agent_cache.cached_run(_AGENT, "q", ("a.com",), semantic=False, cache_if=lambda output: False)
+
+    asyncio.run(run())
+    assert runner.runs == ["Queries", "Queries"]
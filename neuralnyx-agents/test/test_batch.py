@@ -0,0 +1,36 @@
+import importlib.util
+import asyncio
+import os
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_spec = importlib.util.spec_from_file_location("batch", os.path.join(_ROOT, "content-optimization", "batch.py"))
+batch = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(batch)
+
+
+async def _sleep_then_echo(seconds):
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+def test_finished_items_are_kept_when_the_budget_runs_out():
+    config = batch.ProcessorConfig(max_workers=2, timeout_per_item=10, max_retries=1)
+    results = asyncio.run(batch.optimize_many([0.01, 0.01, 5], _sleep_then_echo, config, timeout=0.2))
+
+    assert results[:2] == [0.01, 0.01]
+    assert isinstance(results[2], asyncio.TimeoutError)
+
+
+def test_retries_stop_at_the_deadline():
+    calls = []
+
+    async def flaky(item):
+        calls.append(item)
+        raise RuntimeError("boom")
+
+    config = batch.ProcessorConfig(max_retries=3, retry_backoff=1.0)
+    results = asyncio.run(batch.optimize_many(["a"], flaky, config, timeout=0.5))
+
+    # The 1s backoff before a second attempt would overrun the 0.5s budget
+    assert calls == ["a"]
+    assert isinstance(results[0], RuntimeError)
@@ -0,0 +1,16 @@
+import hashlib
+import os
+
+import pytest
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SERVICES = ["business-query-generator", "content-generator", "content-optimization", "domain-analyzer"]
+
+
+@pytest.mark.parametrize("helper", ["_entrypoint.py", "_logging.py", "agent_cache.py", "fleet.py"])
+def test_helper_copies_are_identical(helper):
+    digests = set()
+    for service in _SERVICES:
+        with open(os.path.join(_ROOT, service, helper), "rb") as f:
+            digests.add(hashlib.sha256(f.read()).hexdigest())
+    assert len(digests) == 1